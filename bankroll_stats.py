@@ -0,0 +1,91 @@
+# bankroll_stats.py — Session math for the Bankroll Health page
+# Pure functions over session rows as returned by db.get_user_sessions; no
+# Streamlit calls, so they can be tested and reused outside the page.
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _profit(s: dict) -> float:
+    return float(s.get("profit_loss") or 0)
+
+
+def _stat_fields(s: dict) -> tuple:
+    """(profit_loss, hands_played, bb_size) with the DB defaults applied."""
+    return (float(s.get("profit_loss") or 0),
+            int(s.get("hands_played") or 0),
+            float(s.get("bb_size") or 2.0))
+
+
+def normalize_sessions(sessions: List[dict]) -> List[dict]:
+    """Coerce the numeric fields in place, once per fetch.
+
+    Callers that render straight from the rows can then read
+    s["profit_loss"], s["hands_played"] and s["bb_size"] as typed values.
+    compute_stats and calc_drawdown apply the same defaults themselves, so
+    raw rows are fine there too.
+    """
+    for s in sessions:
+        s["profit_loss"], s["hands_played"], s["bb_size"] = _stat_fields(s)
+    return sessions
+
+
+def sort_by_start(sessions: List[dict]) -> List[dict]:
+    """Sessions oldest first; missing start times sort to the front."""
+    return sorted(sessions, key=lambda s: s.get("started_at", "") or "")
+
+
+def calc_drawdown(sessions: List[dict], bankroll: float, ordered: Optional[List[dict]] = None) -> dict:
+    """Current and max drawdown, replaying sessions back from today's bankroll.
+
+    ordered: sort_by_start(sessions), when the caller already has it.
+    """
+    if not sessions:
+        return {"current_drawdown": 0, "current_drawdown_pct": 0,
+                "max_drawdown": 0, "max_drawdown_pct": 0, "peak_bankroll": bankroll}
+    sorted_s = ordered if ordered is not None else sort_by_start(sessions)
+    # Replay backwards from today's bankroll: [bankroll, pl_newest, ...] run
+    # through subtract.accumulate gives the balance before each session, newest
+    # first, with the same float rounding as subtracting one session at a time.
+    steps = np.fromiter(map(_profit, reversed(sorted_s)), dtype=np.float64, count=len(sorted_s))
+    hist = np.subtract.accumulate(np.concatenate(([bankroll], steps)))[::-1]
+    peaks = np.maximum.accumulate(hist)
+    dd = peaks - hist
+    i = int(dd.argmax())  # first occurrence, matching the strict > of a running scan
+    max_dd = float(dd[i])
+    max_dd_pct = float(max_dd / peaks[i] * 100) if max_dd > 0 and peaks[i] > 0 else 0
+    cp = float(peaks[-1])
+    cd = cp - bankroll
+    return {"current_drawdown": max(0, cd), "current_drawdown_pct": max(0, (cd / cp * 100) if cp > 0 else 0),
+            "max_drawdown": max_dd, "max_drawdown_pct": max_dd_pct, "peak_bankroll": cp}
+
+
+def session_hours(sessions: List[dict]) -> np.ndarray:
+    """Per-session length in hours; 0 where either timestamp is missing or unparseable."""
+    start = pd.to_datetime(pd.Series([s.get("started_at") for s in sessions], dtype=object),
+                           utc=True, errors="coerce", format="ISO8601")
+    end = pd.to_datetime(pd.Series([s.get("ended_at") for s in sessions], dtype=object),
+                         utc=True, errors="coerce", format="ISO8601")
+    return ((end - start).dt.total_seconds() / 3600).fillna(0.0).to_numpy()
+
+
+def compute_stats(sessions: List[dict]) -> dict:
+    """Lifetime totals, hourly rate and BB/100 (6.0 until there are hands)."""
+    if not sessions:
+        return {"total_profit": 0, "total_hours": 0, "hourly_rate": 0, "total_hands": 0,
+                "bb_per_100": 6.0, "total_sessions": 0, "has_data": False}
+    # One pass over the dicts, then a vectorized reduction per stat
+    profit, hands, bb = np.array(list(map(_stat_fields, sessions)), dtype=float).T
+    hours = session_hours(sessions)
+    n = len(sessions)
+    tp = float(profit.sum())
+    th = float(hours.sum())
+    thn = int(hands.sum())
+    tbb = float(np.divide(profit, bb, out=np.zeros(n), where=bb > 0).sum())
+    return {"total_profit": tp, "total_hours": th, "hourly_rate": tp / th if th > 0 else 0,
+            "total_hands": thn, "bb_per_100": (tbb / thn * 100) if thn > 0 else 6.0,
+            "total_sessions": n, "has_data": th > 0 or thn > 0}
@@ -4,11 +4,13 @@
 from __future__ import annotations
 
 import os
+import time
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 from supabase_client import get_supabase, get_supabase_admin, get_supabase_admin_fresh, get_supabase_admin_for_thread
 
@@ -147,10 +149,11 @@ def update_profile(user_id: str, updates: dict) -> bool:
         sb = get_supabase_admin()
         updates["updated_at"] = _now_iso()
         sb.table("poker_profiles").update(updates).eq("user_id", user_id).execute()
-        return True
     except Exception as e:
         print(f"[db] update_profile error: {e}")
         return False
+    bump_profile_version()
+    return True
 
 
 def update_user_settings(user_id: str, settings: dict) -> bool:
@@ -198,11 +201,24 @@ def update_user_settings(user_id: str, settings: dict) -> bool:
         
         sb = get_supabase_admin()
         sb.table("poker_profiles").update(updates).eq("user_id", user_id).execute()
-        return True
         
     except Exception as e:
         print(f"[db] update_user_settings error: {e}")
         return False
+    bump_profile_version()
+    return True
+
+
+def bump_profile_version() -> None:
+    """Mark saved profile settings as changed for caches keyed on profile_version.
+
+    Called by update_profile and update_user_settings, so a save from any page
+    (Settings included) invalidates profile reads cached elsewhere. A no-op
+    outside a script run, like bump_sessions_version.
+    """
+    if get_script_run_ctx() is None:
+        return
+    st.session_state["profile_version"] = st.session_state.get("profile_version", 0) + 1
 
 
 def update_user_bankroll(user_id: str, bankroll: float) -> bool:
@@ -422,19 +438,47 @@ def end_session(
         
         # Return updated session
         session.update(updates)
-        return session
         
     except Exception as e:
         print(f"[db] end_session error: {e}")
         return None
+    
+    # The write has landed; a failure refreshing caches must not report it as lost
+    try:
+        bump_sessions_version()
+        invalidate_player_badge_info(session.get("user_id"))
+    except Exception as e:
+        print(f"[db] end_session cache invalidation error: {e}")
+    return session
+
+
+def bump_sessions_version() -> None:
+    """Mark the completed-session list as changed for caches keyed on sessions_version.
+
+    Only end_session calls this: get_user_sessions returns completed sessions
+    only, and the other session writes (create_session, update_session, the
+    per-hand counters) touch the active session, which isn't in that list.
+
+    A no-op outside a script run (e.g. worker threads), where session_state
+    would be a throwaway.
+    """
+    if get_script_run_ctx() is None:
+        return
+    st.session_state["sessions_version"] = st.session_state.get("sessions_version", 0) + 1
 
 
 def get_user_sessions(
     user_id: str,
     limit: int = 50,
     include_test: bool = False,
+    columns: str = "*",
 ) -> List[dict]:
-    """Get user's session history."""
+    """Get user's session history.
+    
+    Args:
+        columns: PostgREST select list; pass only the fields a caller reads
+            to keep large histories from shipping every session column.
+    """
     if not user_id:
         return []
     
@@ -442,7 +486,7 @@ def get_user_sessions(
         sb = get_supabase_admin()
         query = (
             sb.table("poker_sessions")
-            .select("*")
+            .select(columns)
             .eq("user_id", user_id)
             .eq("status", "completed")
         )
@@ -573,6 +617,35 @@ def get_bankroll_history(user_id: str, limit: int = 100) -> List[dict]:
 # STATS OPERATIONS
 # =============================================================================
 
+# Player badge summaries (Player Stats' get_player_badge_info) are polled by
+# bots, admin dashboards and leaderboards for many users. Entries are keyed on
+# user_id alone, expire after PLAYER_BADGE_TTL_SEC, and end_session drops the
+# player's entry so a finished session shows up on the next call.
+PLAYER_BADGE_TTL_SEC = 60
+_player_badge_cache: Dict[str, tuple] = {}
+
+
+def get_cached_player_badge(user_id: str) -> Optional[dict]:
+    """Cached badge summary for user_id, or None if missing or expired."""
+    entry = _player_badge_cache.get(user_id)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry[1]
+
+
+def cache_player_badge(user_id: str, info: dict) -> None:
+    """Store a badge summary for user_id for PLAYER_BADGE_TTL_SEC."""
+    _player_badge_cache[user_id] = (time.monotonic() + PLAYER_BADGE_TTL_SEC, info)
+
+
+def invalidate_player_badge_info(user_id: Optional[str] = None) -> None:
+    """Drop user_id's cached badge summary, or every entry when user_id is None."""
+    if user_id is None:
+        _player_badge_cache.clear()
+    else:
+        _player_badge_cache.pop(user_id, None)
+
+
 def get_player_stats(user_id: str, include_test: bool = False) -> dict:
     """
     Get aggregated player statistics.
@@ -24,9 +24,10 @@
 
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Final
 import math
+import time
+from bisect import bisect_right
 
 st.set_page_config(
     page_title="Bankroll Health | Nameless Poker",
@@ -37,6 +38,8 @@ st.set_page_config(
 from auth import require_auth
 from sidebar import render_sidebar
 from db import get_user_sessions, get_player_stats, get_bankroll_history, update_user_bankroll
+from bankroll_stats import calc_drawdown, compute_stats
+from session_cache import user_sessions, sessions_fingerprint, cached_sorted_sessions
 
 # ---------- Auth Gate ----------
 user = require_auth()
@@ -114,12 +117,53 @@ HEALTH_THRESHOLDS = {
     "danger": {"min_bi": 0, "color": "#FF5252", "label": "Danger", "emoji": "🔴"},
 }
 
+# Deep-dive views below the move-up projection, in display order
+HEALTH_VIEWS = (
+    "🎲 Risk Analysis",
+    "🪜 Stakes Ladder",
+    "⚙️ Risk Mode",
+    "📉 Drawdowns",
+    "💎 Rakeback",
+)
+
+# Risk-mode radio options, their positions and display labels
+_RISK_MODE_KEYS: Final[Tuple[str, ...]] = tuple(RISK_MODES)
+_RISK_MODE_INDEX: Final[Dict[str, int]] = {k: i for i, k in enumerate(_RISK_MODE_KEYS)}
+_RISK_MODE_LABELS = {k: f"{m['emoji']} {m['name']}" for k, m in RISK_MODES.items()}
+_RISK_MODE_CUSHION_LABELS = {k: f"{m['emoji']} {m['name']} — {m['buy_ins']} buy-in cushion"
+                             for k, m in RISK_MODES.items()}
+
+# Position of each stake in STAKES_CONFIG, for next-stake lookups by name
+_STAKES_INDEX: Final[Dict[str, int]] = {s["name"]: i for i, s in enumerate(STAKES_CONFIG)}
+
+# Bankroll needed to play each stake (typical buy-in x required buy-ins), per
+# risk mode. Ascending, in STAKES_CONFIG order, so bisect picks the stake.
+_STAKES_REQUIRED = {
+    key: tuple(s["typical_bi"] * mode["buy_ins"] for s in STAKES_CONFIG)
+    for key, mode in RISK_MODES.items()
+}
+
+# The only session fields this page reads; fetched instead of select("*")
+SESSION_COLUMNS = "id, started_at, ended_at, profit_loss, hands_played, bb_size"
+
+# Status keys in ascending min_bi order, for bisect lookups by buy-in count.
+# The cut points skip the lowest tier's minimum, so bisect_right indexes the
+# tables directly and anything below the first cut (negatives too) is danger.
+_HEALTH_KEYS = tuple(sorted(HEALTH_THRESHOLDS, key=lambda k: HEALTH_THRESHOLDS[k]["min_bi"]))
+_HEALTH_TABLE = tuple(HEALTH_THRESHOLDS[k] for k in _HEALTH_KEYS)
+_HEALTH_CUTS = tuple(t["min_bi"] for t in _HEALTH_TABLE[1:])
+
+# Risk-of-ruin exponent factor for the default 80 bb/100 standard deviation
+# (per-hand variance (80/10)^2 = 64), so the common call skips the division.
+_ROR_DEFAULT_STD_DEV: Final[float] = 80.0
+_ROR_DEFAULT_K: Final[float] = -2.0 / (_ROR_DEFAULT_STD_DEV / 10) ** 2
+
 
 # =============================================================================
 # DARK THEME CSS
 # =============================================================================
 
-st.markdown("""
+_CSS: Final[str] = """
 <style>
 @import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;500;600;700;800&family=Inter:wght@300;400;500;600;700&display=swap');
 
@@ -169,30 +213,6 @@ header[data-testid="stHeader"] { background: #0A0A12 !important; }
     background: rgba(75,163,255,0.08) !important;
     color: #4BA3FF !important;
 }
-/* Tabs */
-div[data-baseweb="tab-list"] {
-    background: rgba(255,255,255,0.02) !important;
-    border-radius: 10px !important;
-    padding: 4px !important;
-    gap: 4px !important;
-    border: 1px solid rgba(255,255,255,0.06) !important;
-}
-div[data-baseweb="tab-list"] button {
-    background: transparent !important;
-    color: rgba(255,255,255,0.40) !important;
-    font-family: 'Inter', sans-serif !important;
-    font-weight: 500 !important;
-    font-size: 13px !important;
-    border-radius: 8px !important;
-    padding: 8px 16px !important;
-    border: none !important;
-}
-div[data-baseweb="tab-list"] button[aria-selected="true"] {
-    background: rgba(75,163,255,0.10) !important;
-    color: #4BA3FF !important;
-    font-weight: 600 !important;
-}
-div[data-baseweb="tab-highlight"], div[data-baseweb="tab-border"] { display: none !important; }
 /* Buttons */
 .stButton > button {
     font-family: 'JetBrains Mono', monospace !important;
@@ -642,7 +662,15 @@ hr { border-color: rgba(255,255,255,0.06) !important; }
     .hero-bankroll { font-size: 34px; }
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def inject_css():
+    # Same approach as Player Stats: st.html skips the markdown parser, and the
+    # stylesheet is re-emitted each rerun because Streamlit drops elements a
+    # rerun doesn't produce, so it can't be injected once via st.cache_resource.
+    st.html(_CSS)
+
+inject_css()
 
 
 # =============================================================================
@@ -656,7 +684,9 @@ def get_current_bankroll() -> float:
     return float(st.session_state.get("bankroll", 0) or 0)
 
 def get_risk_mode() -> str:
-    return st.session_state.get("risk_mode", "balanced")
+    # Resolved once per rerun; render functions index RISK_MODES directly
+    mode = st.session_state.get("risk_mode", "balanced")
+    return mode if mode in RISK_MODES else "balanced"
 
 def fmt(amount, sign=False):
     """Format money."""
@@ -671,98 +701,71 @@ def fmtc(amount):
     return f"${amount:,.2f}"
 
 def get_stakes_for_bankroll(bankroll, risk_mode):
-    mode = RISK_MODES.get(risk_mode, RISK_MODES["balanced"])
-    req = mode["buy_ins"]
-    rec = STAKES_CONFIG[0]
-    for s in STAKES_CONFIG:
-        if bankroll >= s["typical_bi"] * req:
-            rec = s
-        else:
-            break
-    return rec
+    required = _STAKES_REQUIRED.get(risk_mode, _STAKES_REQUIRED["balanced"])
+    return STAKES_CONFIG[max(0, bisect_right(required, bankroll) - 1)]
 
 def get_buy_ins(bankroll, stakes):
     bi = stakes["typical_bi"]
     return bankroll / bi if bi > 0 else 0
 
 def get_health_status(buy_ins):
-    if buy_ins >= 20: return HEALTH_THRESHOLDS["excellent"]
-    if buy_ins >= 15: return HEALTH_THRESHOLDS["healthy"]
-    if buy_ins >= 12: return HEALTH_THRESHOLDS["adequate"]
-    if buy_ins >= 8: return HEALTH_THRESHOLDS["warning"]
-    return HEALTH_THRESHOLDS["danger"]
+    return _HEALTH_TABLE[bisect_right(_HEALTH_CUTS, buy_ins)]
 
 def get_status_class(buy_ins):
-    if buy_ins >= 20: return "excellent"
-    if buy_ins >= 15: return "healthy"
-    if buy_ins >= 12: return "adequate"
-    if buy_ins >= 8: return "warning"
-    return "danger"
+    return _HEALTH_KEYS[bisect_right(_HEALTH_CUTS, buy_ins)]
 
 def badge_class(buy_ins):
     if buy_ins >= 15: return "green"
     if buy_ins >= 8: return "amber"
     return "red"
 
-def calc_ror(bankroll, stakes, bb_per_100=6.0, std_dev=80.0):
+def calc_ror(bankroll, stakes, bb_per_100=6.0, std_dev=_ROR_DEFAULT_STD_DEV):
     if bankroll <= 0 or stakes["bb"] <= 0: return 1.0
     bankroll_bb = bankroll / stakes["bb"]
     edge = bb_per_100 / 100
     if edge <= 0: return 1.0
-    var = (std_dev / 10) ** 2
-    exp = max(-100, min(100, -2 * edge * bankroll_bb / var))
-    return min(1.0, max(0.0, math.exp(exp)))
-
-def calc_drawdown(sessions, bankroll):
-    if not sessions:
-        return {"current_drawdown": 0, "current_drawdown_pct": 0,
-                "max_drawdown": 0, "max_drawdown_pct": 0, "peak_bankroll": bankroll}
-    sorted_s = sorted(sessions, key=lambda s: s.get("started_at", "") or "")
-    running = bankroll
-    hist = [running]
-    for s in reversed(sorted_s):
-        running -= float(s.get("profit_loss", 0) or 0)
-        hist.insert(0, running)
-    peak = hist[0]
-    max_dd = max_dd_pct = 0
-    for b in hist:
-        if b > peak: peak = b
-        dd = peak - b
-        if dd > max_dd:
-            max_dd = dd
-            max_dd_pct = (dd / peak * 100) if peak > 0 else 0
-    cp = max(hist)
-    cd = cp - bankroll
-    return {"current_drawdown": max(0, cd), "current_drawdown_pct": max(0, (cd / cp * 100) if cp > 0 else 0),
-            "max_drawdown": max_dd, "max_drawdown_pct": max_dd_pct, "peak_bankroll": cp}
+    if std_dev == _ROR_DEFAULT_STD_DEV:
+        k = _ROR_DEFAULT_K
+    else:
+        k = -2.0 / (std_dev / 10) ** 2
+    # bankroll, edge and variance are all positive here, so the exponent is
+    # <= 0 and exp() already lands in (0, 1]; it underflows to 0.0 without raising.
+    return math.exp(k * edge * bankroll_bb)
 
 def get_next_stakes(current):
-    for i, s in enumerate(STAKES_CONFIG):
-        if s["name"] == current["name"] and i + 1 < len(STAKES_CONFIG):
-            return STAKES_CONFIG[i + 1]
-    return None
-
-def compute_stats(sessions):
-    if not sessions:
-        return {"total_profit": 0, "total_hours": 0, "hourly_rate": 0, "total_hands": 0,
-                "bb_per_100": 6.0, "total_sessions": 0, "has_data": False}
-    tp = th = thn = tbb = 0
-    for s in sessions:
-        pl = float(s.get("profit_loss", 0) or 0)
-        tp += pl
-        started, ended = s.get("started_at", ""), s.get("ended_at", "")
-        if started and ended:
-            try:
-                th += (datetime.fromisoformat(ended.replace("Z", "+00:00")) -
-                       datetime.fromisoformat(started.replace("Z", "+00:00"))).total_seconds() / 3600
-            except Exception: pass
-        h = int(s.get("hands_played", 0) or 0)
-        thn += h
-        bb = float(s.get("bb_size", 2.0) or 2.0)
-        if bb > 0: tbb += pl / bb
-    return {"total_profit": tp, "total_hours": th, "hourly_rate": tp / th if th > 0 else 0,
-            "total_hands": thn, "bb_per_100": (tbb / thn * 100) if thn > 0 else 6.0,
-            "total_sessions": len(sessions), "has_data": th > 0 or thn > 0}
+    i = _STAKES_INDEX.get(current["name"])
+    return STAKES_CONFIG[i + 1] if i is not None and i + 1 < len(STAKES_CONFIG) else None
+
+# ── Cached DB wrappers ──
+# The session fetch and its fingerprint live in session_cache, shared with
+# Player Stats. Stats are keyed on that fingerprint (the underscore keeps
+# Streamlit from hashing the sessions themselves).
+
+# Saved profile settings, read when session_state has no bankroll yet. Keyed on
+# profile_version, which db.update_profile / update_user_settings bump on every
+# save (Settings page included); this page's direct user_mode writes clear it,
+# so a later read never revives old values.
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_profile_settings(user_id, profile_version):
+    from db import get_supabase_admin
+    result = get_supabase_admin().table("poker_profiles").select(
+        "current_bankroll, user_mode, default_stakes"
+    ).eq("user_id", user_id).execute()
+    return result.data[0] if result.data else None
+
+# How long derived stats are reused for an unchanged fingerprint, both in
+# _cached_stats and in main()'s per-session memo
+STATS_TTL_SEC = 300
+
+@st.cache_data(ttl=STATS_TTL_SEC, max_entries=32, show_spinner=False)
+def _cached_stats(user_id, fingerprint, _sessions):
+    """(stats, computed_at) — the timestamp is cached with the entry, so
+    later hits report when it was really computed."""
+    return compute_stats(_sessions), time.time()
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _cached_drawdown(user_id, fingerprint, bankroll, _sessions):
+    return calc_drawdown(_sessions, bankroll, cached_sorted_sessions(user_id, fingerprint, _sessions))
 
 
 # =============================================================================
@@ -773,7 +776,7 @@ def render_empty_state():
     """Rich educational empty state that teaches bankroll management."""
 
     # ---- Hero Introduction ----
-    st.markdown("""
+    st.html("""
         <div class="edu-section" style="text-align: center; padding: 36px 32px;">
             <div style="font-size: 44px; margin-bottom: 12px;">💰</div>
             <div class="edu-title" style="font-size: 24px; text-align: center;">
@@ -785,10 +788,10 @@ def render_empty_state():
                 when to move up, and when to move down.
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # ---- Why Bankroll Matters ----
-    st.markdown("""
+    st.html("""
         <div class="edu-section">
             <div class="edu-title">Why This Matters</div>
             <div class="edu-text">
@@ -805,10 +808,10 @@ def render_empty_state():
                 We handle the math — you just need to tell us your current bankroll.
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # ---- Stakes Reference Table ----
-    st.markdown("""
+    st.html("""
         <div class="edu-section">
             <div class="edu-title">Bankroll Requirements by Stakes</div>
             <div class="edu-subtitle">
@@ -867,23 +870,23 @@ def render_empty_state():
                 </tr>
             </table>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # ---- Three Risk Modes Explained ----
-    st.markdown('<div class="edu-section">', unsafe_allow_html=True)
-    st.markdown('<div class="edu-title">Choose Your Risk Profile</div>', unsafe_allow_html=True)
-    st.markdown("""
+    parts = ["""
+        <div class="edu-section">
+        <div class="edu-title">Choose Your Risk Profile</div>
         <div class="edu-subtitle">
             Your risk mode determines how many buy-ins you keep as a safety cushion, 
             your session stop-loss/stop-win limits, and how quickly you move up through stakes. 
             Each has trade-offs — there's no wrong answer.
         </div>
-    """, unsafe_allow_html=True)
+    """]
 
     for key, m in RISK_MODES.items():
         cls = "agg" if key == "aggressive" else "bal" if key == "balanced" else "con"
         rec_tag = '<span class="rec-tag">RECOMMENDED</span>' if key == "balanced" else ""
-        st.markdown(f"""
+        parts.append(f"""
             <div class="mode-compare {cls}">
                 <div class="mc-header">
                     <div class="mc-name">{m['emoji']} {m['name']}{rec_tag}</div>
@@ -905,12 +908,13 @@ def render_empty_state():
                     </div>
                 </div>
             </div>
-        """, unsafe_allow_html=True)
+        """)
 
-    st.markdown('</div>', unsafe_allow_html=True)
+    parts.append("</div>")
+    st.html("".join(parts))
 
     # ---- Move Up / Move Down Rules ----
-    st.markdown("""
+    st.html("""
         <div class="edu-section">
             <div class="edu-title">When to Move Up & Down</div>
             <div class="edu-text">
@@ -930,10 +934,10 @@ def render_empty_state():
                 recommendations — never any guesswork.
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # ---- Annual Profit Projections ----
-    st.markdown("""
+    st.html("""
         <div class="edu-section">
             <div class="edu-title">What You Can Expect</div>
             <div class="edu-subtitle">
@@ -964,13 +968,13 @@ def render_empty_state():
                 See the <span style="color:rgba(255,255,255,0.40);font-weight:600;">EV System</span> page for detailed breakdowns.
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # ================================================================
     # INTERACTIVE SETUP — Risk Mode + Bankroll + Live Preview
     # ================================================================
 
-    st.markdown("""
+    st.html("""
         <div class="edu-section">
             <div class="edu-title">Set Up Your Bankroll</div>
             <div class="edu-subtitle">
@@ -981,10 +985,10 @@ def render_empty_state():
                 risking going broke during a normal downswing.
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # ---- STEP 1: Risk Mode ----
-    st.markdown("""
+    st.html("""
         <div class="edu-section">
             <div class="edu-title" style="font-size: 15px;">
                 Step 1 — How much risk can you handle?
@@ -995,13 +999,13 @@ def render_empty_state():
                 <span style="color: rgba(255,255,255,0.60);">Not sure? Start with Balanced — you can change anytime.</span>
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     risk_mode = st.radio(
         "YOUR RISK MODE",
-        options=list(RISK_MODES.keys()),
-        format_func=lambda x: f"{RISK_MODES[x]['emoji']} {RISK_MODES[x]['name']} — {RISK_MODES[x]['buy_ins']} buy-in cushion",
-        index=1,
+        options=_RISK_MODE_KEYS,
+        format_func=_RISK_MODE_CUSHION_LABELS.__getitem__,
+        index=_RISK_MODE_INDEX["balanced"],
         horizontal=False,
         key="empty_risk_mode"
     )
@@ -1011,7 +1015,7 @@ def render_empty_state():
     sel_mode = RISK_MODES[risk_mode]
     sel_cls = "agg" if risk_mode == "aggressive" else "bal" if risk_mode == "balanced" else "con"
     rec_tag = '<span class="rec-tag">RECOMMENDED</span>' if risk_mode == "balanced" else ""
-    st.markdown(f"""
+    st.html(f"""
         <div class="mode-compare {sel_cls}" style="margin-top: 8px; margin-bottom: 20px;">
             <div class="mc-header">
                 <div class="mc-name">{sel_mode['emoji']} {sel_mode['name']}{rec_tag}</div>
@@ -1033,10 +1037,10 @@ def render_empty_state():
                 </div>
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # ---- STEP 2: Bankroll ----
-    st.markdown(f"""
+    st.html(f"""
         <div class="edu-section">
             <div class="edu-title" style="font-size: 15px;">
                 Step 2 — Enter your poker bankroll
@@ -1048,7 +1052,7 @@ def render_empty_state():
                 We'll show you exactly which stakes your bankroll unlocks.
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     col1, col2 = st.columns([3, 1])
     with col1:
@@ -1057,7 +1061,7 @@ def render_empty_state():
             min_value=0.0, value=3000.0, step=100.0, format="%.2f"
         )
     with col2:
-        st.markdown("<div style='height: 28px'></div>", unsafe_allow_html=True)
+        st.html("<div style='height: 28px'></div>")
         if st.button("Set Bankroll →", type="primary", use_container_width=True):
             st.session_state["bankroll"] = bankroll
             uid = get_user_id()
@@ -1071,6 +1075,7 @@ def render_empty_state():
                     ).eq("user_id", uid).execute()
                 except Exception:
                     pass
+                _cached_profile_settings.clear()
             st.rerun()
 
     # ---- LIVE PREVIEW — What your bankroll unlocks ----
@@ -1166,15 +1171,15 @@ def render_empty_state():
 
         # ---- Render the live preview in separate markdown calls ----
         # Title
-        st.markdown(f"""
+        st.html(f"""
             <div class="edu-section" style="margin-top: 12px;">
                 <div class="edu-title" style="font-size: 15px;">
                     Your Bankroll: {fmtc(bankroll)} in {sel_mode['name']} Mode
                 </div>
-        """, unsafe_allow_html=True)
+        """)
 
         # 3-mode comparison strip
-        st.markdown(f"""
+        st.html(f"""
             <div style="margin-bottom: 18px;">
                 <div style="display:grid;grid-template-columns:repeat(3,1fr);gap:10px;margin-bottom:10px;">
                     {compare_html}
@@ -1183,20 +1188,20 @@ def render_empty_state():
                     {mode_note}
                 </div>
             </div>
-        """, unsafe_allow_html=True)
+        """)
 
         # Stakes ladder header + rows
-        st.markdown(f"""
+        st.html(f"""
             <div style="font-family:'Inter',sans-serif;font-size:11px;font-weight:600;color:rgba(255,255,255,0.30);
                 text-transform:uppercase;letter-spacing:0.06em;margin-bottom:8px;">
                 Stakes unlocked with {fmtc(bankroll)}
             </div>
-        """, unsafe_allow_html=True)
+        """)
 
-        st.markdown(ladder_html, unsafe_allow_html=True)
+        st.html(ladder_html)
 
         # Bottom callout + close the edu-section div
-        st.markdown(f"""
+        st.html(f"""
                 <div class="callout" style="margin-top: 14px;">
                     You'll play <span style="color:{sel_mode['color']};font-weight:600;">{rec['name']}</span> with
                     <span class="edu-highlight">{rec_bis:.1f} buy-ins</span> of cushion.
@@ -1204,7 +1209,7 @@ def render_empty_state():
                     {move_up_text}{move_down_text}
                 </div>
             </div>
-        """, unsafe_allow_html=True)
+        """)
 
 
 # =============================================================================
@@ -1219,7 +1224,7 @@ def render_fundamentals(bankroll, risk_mode, rec_stakes):
     with st.expander("📚 Bankroll Fundamentals", expanded=False):
 
         # ---- Stakes Requirements Table ----
-        st.markdown("""
+        st.html("""
             <div class="edu-section" style="margin-top: 0;">
                 <div class="edu-title">Bankroll Requirements by Stakes</div>
                 <div class="edu-subtitle">
@@ -1278,7 +1283,7 @@ def render_fundamentals(bankroll, risk_mode, rec_stakes):
                     </tr>
                 </table>
             </div>
-        """, unsafe_allow_html=True)
+        """)
 
         # ---- Move Up / Move Down Rules ----
         # Personalize with their current bankroll and stakes
@@ -1304,7 +1309,7 @@ def render_fundamentals(bankroll, risk_mode, rec_stakes):
             'You\'re at the lowest tracked stakes — focus on building your bankroll before considering a move up.'
         )
 
-        st.markdown(f"""
+        st.html(f"""
             <div class="edu-section">
                 <div class="edu-title">When to Move Up & Down</div>
                 <div class="edu-text">{move_up_line}</div>
@@ -1314,10 +1319,10 @@ def render_fundamentals(bankroll, risk_mode, rec_stakes):
                     and in your Stakes Ladder tab.
                 </div>
             </div>
-        """, unsafe_allow_html=True)
+        """)
 
         # ---- Annual Profit Projections ----
-        st.markdown("""
+        st.html("""
             <div class="edu-section">
                 <div class="edu-title">Annual Profit Projections</div>
                 <div class="edu-subtitle">
@@ -1348,18 +1353,22 @@ def render_fundamentals(bankroll, risk_mode, rec_stakes):
                     See the <span style="color:rgba(255,255,255,0.40);font-weight:600;">EV System</span> page for detailed breakdowns.
                 </div>
             </div>
-        """, unsafe_allow_html=True)
+        """)
 
 
 # =============================================================================
 # RENDER FUNCTIONS — DASHBOARD (when bankroll is set)
 # =============================================================================
 
+# Hero status pill per health tier, built once from HEALTH_THRESHOLDS
+_STATUS_BADGE_HTML = {
+    key: f'<div class="badge {badge_class(t["min_bi"])}">{t["emoji"]} {t["label"]}</div>'
+    for key, t in HEALTH_THRESHOLDS.items()
+}
+
 def render_hero(bankroll, stats, rec_stakes, risk_mode):
     bis = get_buy_ins(bankroll, rec_stakes)
-    status = get_health_status(bis)
     cls = get_status_class(bis)
-    bcls = badge_class(bis)
     mode = RISK_MODES[risk_mode]
 
     hr_disp = fmt(stats["hourly_rate"], sign=True) if stats["has_data"] else "—"
@@ -1368,9 +1377,9 @@ def render_hero(bankroll, stats, rec_stakes, risk_mode):
     bb_cls = "green" if stats["bb_per_100"] > 0 else "red" if stats["bb_per_100"] < 0 else ""
     h_disp = f'{stats["total_hours"]:.0f}h' if stats["has_data"] else "—"
 
-    st.markdown(f"""
+    st.html(f"""
         <div class="hero {cls}">
-            <div class="badge {bcls}">{status['emoji']} {status['label']}</div>
+            {_STATUS_BADGE_HTML[cls]}
             <div class="hero-bankroll">{fmtc(bankroll)}</div>
             <div class="hero-sub">{bis:.1f} buy-ins at {rec_stakes['name']} · {mode['name']} mode</div>
             <div class="sg sg-4">
@@ -1396,7 +1405,7 @@ def render_hero(bankroll, stats, rec_stakes, risk_mode):
                 </div>
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # Explain data sources: bankroll = manual, stats = automatic from sessions
     if stats["has_data"]:
@@ -1414,22 +1423,27 @@ def render_hero(bankroll, stats, rec_stakes, risk_mode):
             'from real data and power your move-up projections.'
         )
 
-    st.markdown(f"""
+    st.html(f"""
         <div style="font-family:'Inter',sans-serif;font-size:11px;color:rgba(255,255,255,0.20);
             text-align:center;margin-top:-12px;margin-bottom:16px;line-height:1.5;">
             {source_text}
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
 
+@st.fragment
 def render_bankroll_editor(bankroll, user_id, risk_mode, rec_stakes):
-    """Bankroll editor with context about when/why to update and impact preview."""
+    """Bankroll editor with context about when/why to update and impact preview.
+
+    A fragment, so typing a new amount only reruns the editor and its live
+    preview; Update still calls st.rerun() for the whole page.
+    """
     mode = RISK_MODES[risk_mode]
     bis = get_buy_ins(bankroll, rec_stakes)
     nxt = get_next_stakes(rec_stakes)
 
     # Context: when should you update?
-    st.markdown(f"""
+    st.html(f"""
         <div class="dk">
             <div class="dk-hdr">💰 UPDATE BANKROLL</div>
             <div style="font-family:'Inter',sans-serif;font-size:12px;color:rgba(255,255,255,0.40);
@@ -1440,14 +1454,14 @@ def render_bankroll_editor(bankroll, user_id, risk_mode, rec_stakes):
                 <span style="color:{mode['color']};font-weight:600;">{bis:.1f} buy-ins</span> at 
                 <span style="color:#fff;font-weight:600;">{rec_stakes['name']}</span>.
             </div>
-    """, unsafe_allow_html=True)
+    """)
 
     col1, col2 = st.columns([3, 1])
     with col1:
         new_br = st.number_input("NEW BANKROLL AMOUNT", min_value=0.0, value=bankroll,
                                   step=100.0, format="%.2f", key="br_edit")
     with col2:
-        st.markdown("<div style='height: 28px'></div>", unsafe_allow_html=True)
+        st.html("<div style='height: 28px'></div>")
         if st.button("💰 Update", type="primary", use_container_width=True, key="br_btn"):
             if new_br != bankroll:
                 st.session_state["bankroll"] = new_br
@@ -1505,7 +1519,7 @@ def render_bankroll_editor(bankroll, user_id, risk_mode, rec_stakes):
                 )
 
         impact_html += "</div>"
-        st.markdown(impact_html, unsafe_allow_html=True)
+        st.html(impact_html)
 
     # Move-up/down thresholds for context
     threshold_parts = []
@@ -1522,14 +1536,12 @@ def render_bankroll_editor(bankroll, user_id, risk_mode, rec_stakes):
         )
 
     if threshold_parts:
-        st.markdown(f"""
+        st.html(f"""
             <div style="font-family:'Inter',sans-serif;font-size:11px;color:rgba(255,255,255,0.25);
                 margin-top:12px;line-height:1.6;">
                 {'  ·  '.join(threshold_parts)}
             </div>
-        """, unsafe_allow_html=True)
-
-    st.markdown("</div>", unsafe_allow_html=True)
+        """)
 
 
 def render_move_up(bankroll, stats, rec_stakes, risk_mode):
@@ -1537,7 +1549,7 @@ def render_move_up(bankroll, stats, rec_stakes, risk_mode):
     nxt = get_next_stakes(rec_stakes)
 
     if not nxt:
-        st.markdown("""
+        st.html("""
             <div class="dk"><div class="dk-hdr">📈 MOVE-UP PROJECTION</div>
             <div style="text-align:center;padding:16px;">
                 <div style="font-family:'JetBrains Mono',monospace;font-size:22px;font-weight:700;color:#69F0AE;">
@@ -1545,7 +1557,7 @@ def render_move_up(bankroll, stats, rec_stakes, risk_mode):
                 <div style="font-family:'Inter',sans-serif;font-size:12px;color:rgba(255,255,255,0.30);margin-top:6px;">
                     You're at the highest stakes we track. Keep crushing.</div>
             </div></div>
-        """, unsafe_allow_html=True)
+        """)
         return
 
     target = nxt["typical_bi"] * mode["buy_ins"]
@@ -1571,7 +1583,7 @@ def render_move_up(bankroll, stats, rec_stakes, risk_mode):
                    'Play some hands and your real win rate will drive these projections.</div>'
                    if not stats["has_data"] else "")
 
-    st.markdown(f"""
+    st.html(f"""
         <div class="moveup">
             <div class="dk-hdr">📈 MOVE-UP PROJECTION</div>
             <div class="moveup-target">→ {nxt['name']}</div>
@@ -1590,10 +1602,31 @@ def render_move_up(bankroll, stats, rec_stakes, risk_mode):
             </div>
             {no_data_msg}
         </div>
-    """, unsafe_allow_html=True)
+    """)
+
+
+def emit_memo_html(name, fingerprint, build):
+    """Emit build()'s HTML, reusing the last rendered string while the
+    inputs fingerprint is unchanged.
+
+    Streamlit still needs the element re-emitted on every rerun, so only
+    the HTML assembly is skipped, not the st.html call.
+    """
+    slot = f"_last_render_{name}"
+    cached = st.session_state.get(slot)
+    if cached is None or cached[0] != fingerprint:
+        cached = (fingerprint, build())
+        st.session_state[slot] = cached
+    st.html(cached[1])
 
 
 def render_risk_of_ruin(bankroll, stakes, bb100, stats):
+    fingerprint = (bankroll, stakes["name"], bb100, stats["has_data"], stats["total_hands"])
+    emit_memo_html("risk_of_ruin", fingerprint,
+                   lambda: _risk_of_ruin_html(bankroll, stakes, bb100, stats))
+
+
+def _risk_of_ruin_html(bankroll, stakes, bb100, stats):
     ror = calc_ror(bankroll, stakes, bb100)
     ror_pct = ror * 100
     if ror_pct < 1: color, label, desc = "#69F0AE", "Very Low", "Your bankroll is well-protected against normal variance."
@@ -1604,7 +1637,7 @@ def render_risk_of_ruin(bankroll, stakes, bb100, stats):
 
     bb_total = bankroll / stakes["bb"] if stakes["bb"] > 0 else 0
 
-    st.markdown(f"""
+    return f"""
         <div class="dk">
             <div class="dk-hdr">🎲 RISK OF RUIN</div>
             <div style="display:grid;grid-template-columns:1fr 2fr;gap:24px;align-items:start;">
@@ -1629,11 +1662,11 @@ def render_risk_of_ruin(bankroll, stakes, bb100, stats):
                 </div>
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """
 
 
-def render_drawdown(sessions, bankroll):
-    dd = calc_drawdown(sessions, bankroll)
+def render_drawdown(sessions, bankroll, user_id):
+    dd = _cached_drawdown(user_id, sessions_fingerprint(sessions), bankroll, sessions)
     cd, cdp = dd["current_drawdown"], dd["current_drawdown_pct"]
     md, mdp, pk = dd["max_drawdown"], dd["max_drawdown_pct"], dd["peak_bankroll"]
     if cdp == 0: dc, dl = "#69F0AE", "At Peak"
@@ -1641,7 +1674,7 @@ def render_drawdown(sessions, bankroll):
     elif cdp < 20: dc, dl = "#FFB300", "Moderate"
     else: dc, dl = "#FF5252", "Significant"
 
-    st.markdown(f"""
+    st.html(f"""
         <div class="dk">
             <div class="dk-hdr">📉 DRAWDOWN ANALYSIS</div>
             <div class="dd-grid">
@@ -1661,17 +1694,19 @@ def render_drawdown(sessions, bankroll):
                 A healthy bankroll (15+ buy-ins) withstands these swings without needing to move down.
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
 
 def render_stakes_ladder(bankroll, risk_mode, current_stakes):
-    mode = RISK_MODES.get(risk_mode, RISK_MODES["balanced"])
-    req = mode["buy_ins"]
+    emit_memo_html("stakes_ladder", (bankroll, risk_mode, current_stakes["name"]),
+                   lambda: _stakes_ladder_html(bankroll, risk_mode, current_stakes))
+
+
+def _stakes_ladder_html(bankroll, risk_mode, current_stakes):
+    req = RISK_MODES[risk_mode]["buy_ins"]
 
-    html = '<div class="dk"><div class="dk-hdr">🪜 STAKES LADDER</div>'
-    for s in STAKES_CONFIG:
-        min_br = s["typical_bi"] * req
-        bis = get_buy_ins(bankroll, s)
+    rows = []
+    for s, min_br in zip(STAKES_CONFIG, _STAKES_REQUIRED[risk_mode]):
         is_curr = s["name"] == current_stakes["name"]
         avail = bankroll >= min_br
 
@@ -1682,15 +1717,14 @@ def render_stakes_ladder(bankroll, risk_mode, current_stakes):
         else:
             cls, stxt, scol = "locked", f"🔒 Need {fmtc(min_br - bankroll)}", "rgba(255,255,255,0.25)"
 
-        html += (
+        rows.append(
             f'<div class="ls {cls}">'
             f'<div class="ls-name">{s["name"]}</div>'
             f'<div class="ls-req">{fmtc(min_br)} required ({req} × {fmtc(s["typical_bi"])})</div>'
             f'<div class="ls-status" style="color:{scol};">{stxt}</div>'
             f'</div>'
         )
-    html += '</div>'
-    st.markdown(html, unsafe_allow_html=True)
+    return f'<div class="dk"><div class="dk-hdr">🪜 STAKES LADDER</div>{"".join(rows)}</div>'
 
 
 def render_risk_mode_selector(current_mode, bankroll, rec_stakes):
@@ -1699,25 +1733,25 @@ def render_risk_mode_selector(current_mode, bankroll, rec_stakes):
     bis = get_buy_ins(bankroll, rec_stakes)
 
     # Build comparison cards showing what each mode means for THIS bankroll
-    cards = '<div class="rm-grid">'
+    cards = []
     for k, m in RISK_MODES.items():
         sel = k == current_mode
-        m_rec = get_stakes_for_bankroll(bankroll, k)
-        m_bis = get_buy_ins(bankroll, m_rec)
+        if sel:
+            m_rec, m_bis = rec_stakes, bis
+        else:
+            m_rec = get_stakes_for_bankroll(bankroll, k)
+            m_bis = get_buy_ins(bankroll, m_rec)
         m_status = get_health_status(m_bis)
-        stakes_differ = m_rec["name"] != rec_stakes["name"]
 
-        scls = "sel" if sel else ""
-        bc = m["color"] if sel else "rgba(255,255,255,0.06)"
-        bg = "rgba(255,255,255,0.04)" if sel else "rgba(255,255,255,0.02)"
-
-        # Show stakes + buy-ins for this mode
-        stakes_color = m["color"] if sel else "rgba(255,255,255,0.55)"
-        current_tag = ('<span style="font-size:8px;color:rgba(255,255,255,0.30);'
-                       'text-transform:uppercase;letter-spacing:0.05em;">CURRENT</span><br>'
-                       if sel else '')
+        if sel:
+            scls, bc, bg, stakes_color = "sel", m["color"], "rgba(255,255,255,0.04)", m["color"]
+            current_tag = ('<span style="font-size:8px;color:rgba(255,255,255,0.30);'
+                           'text-transform:uppercase;letter-spacing:0.05em;">CURRENT</span><br>')
+        else:
+            scls, bc, bg, stakes_color = "", "rgba(255,255,255,0.06)", "rgba(255,255,255,0.02)", "rgba(255,255,255,0.55)"
+            current_tag = ""
 
-        cards += (
+        cards.append(
             f'<div class="rm {scls}" style="border-color:{bc};background:{bg};">'
             f'{current_tag}'
             f'<div class="rm-emoji">{m["emoji"]}</div>'
@@ -1732,10 +1766,10 @@ def render_risk_mode_selector(current_mode, bankroll, rec_stakes):
             f'<div class="rm-desc" style="margin-top:8px;">{m["description"]}</div>'
             f'</div>'
         )
-    cards += '</div>'
 
-    # Render header and intro text
-    st.markdown(f"""
+    # Header, mode cards and selected-mode details go out as one element so
+    # the dk panel actually wraps them
+    st.html(f"""
         <div class="dk">
             <div class="dk-hdr">⚙️ RISK MODE</div>
             <div style="font-family:'Inter',sans-serif;font-size:12px;color:rgba(255,255,255,0.40);
@@ -1744,39 +1778,32 @@ def render_risk_mode_selector(current_mode, bankroll, rec_stakes):
                 Changing modes may change your recommended stakes. Below shows what each mode 
                 means for your current bankroll of <span style="color:#fff;font-weight:600;">{fmtc(bankroll)}</span>.
             </div>
-    """, unsafe_allow_html=True)
-
-    # Render mode cards separately
-    st.markdown(cards, unsafe_allow_html=True)
-
-    # Expanded details for selected mode
-    cm = RISK_MODES[current_mode]
-    st.markdown(f"""
+            <div class="rm-grid">{"".join(cards)}</div>
         <div style="margin-top:14px;">
-            <div class="mc-body">{cm['personality']}</div>
+            <div class="mc-body">{mode['personality']}</div>
             <div class="mc-stats">
                 <div class="mc-stat">
                     <div class="mc-stat-label">Session Stop-Loss</div>
-                    <div class="mc-stat-val">{cm['stop_loss']} BI ({fmtc(cm['stop_loss'] * rec_stakes['typical_bi'])})</div>
+                    <div class="mc-stat-val">{mode['stop_loss']} BI ({fmtc(mode['stop_loss'] * rec_stakes['typical_bi'])})</div>
                 </div>
                 <div class="mc-stat">
                     <div class="mc-stat-label">Session Stop-Win</div>
-                    <div class="mc-stat-val">{cm['stop_win']} BI ({fmtc(cm['stop_win'] * rec_stakes['typical_bi'])})</div>
+                    <div class="mc-stat-val">{mode['stop_win']} BI ({fmtc(mode['stop_win'] * rec_stakes['typical_bi'])})</div>
                 </div>
                 <div class="mc-stat">
                     <div class="mc-stat-label">Risk of Ruin</div>
-                    <div class="mc-stat-val">{cm['ror_15bi']}</div>
+                    <div class="mc-stat-val">{mode['ror_15bi']}</div>
                 </div>
             </div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
     new_mode = st.radio(
         "Select Risk Mode",
-        options=list(RISK_MODES.keys()),
-        format_func=lambda x: f"{RISK_MODES[x]['emoji']} {RISK_MODES[x]['name']}",
-        index=list(RISK_MODES.keys()).index(current_mode),
+        options=_RISK_MODE_KEYS,
+        format_func=_RISK_MODE_LABELS.__getitem__,
+        index=_RISK_MODE_INDEX[current_mode],
         horizontal=True,
         key="risk_mode_selector"
     )
@@ -1799,7 +1826,7 @@ def render_risk_mode_selector(current_mode, bankroll, rec_stakes):
                 stakes_note = (f'<br>📉 Stakes drop to <span style="color:#FFB300;font-weight:600;">'
                                f'{new_rec["name"]}</span> — {new_m["name"]} mode requires more buy-ins per stake level.')
 
-        st.markdown(f"""
+        st.html(f"""
             <div class="{callout_cls}" style="margin-top:10px;">
                 Switching to <span style="color:{new_m['color']};font-weight:600;">{new_m['name']}</span>: 
                 Play <span style="font-weight:600;">{new_rec['name']}</span> with {new_bis:.1f} buy-ins.
@@ -1807,7 +1834,7 @@ def render_risk_mode_selector(current_mode, bankroll, rec_stakes):
                 Stop-loss changes to {new_m['stop_loss']} BI ({fmtc(new_m['stop_loss'] * new_rec['typical_bi'])}).
                 {stakes_note}
             </div>
-        """, unsafe_allow_html=True)
+        """)
 
         st.session_state["risk_mode"] = new_mode
         try:
@@ -1820,6 +1847,7 @@ def render_risk_mode_selector(current_mode, bankroll, rec_stakes):
                 ).eq("user_id", uid).execute()
         except Exception:
             pass
+        _cached_profile_settings.clear()
         st.rerun()
 
 
@@ -1866,8 +1894,11 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
         {"name": "PokerStars", "pct": 15, "note": "Chest rewards (lower volume)", "crypto": False},
     ]
 
+    # The whole tab goes out as one element; the dk panel wraps every section
+    parts = []
+
     # Intro
-    st.markdown(f"""
+    parts.append(f"""
         <div class="dk">
             <div class="dk-hdr">💎 RAKEBACK & SUBSCRIPTION ROI</div>
             <div style="font-family:Inter,sans-serif;font-size:12px;color:rgba(255,255,255,0.40);
@@ -1881,10 +1912,10 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
                 margin-bottom:16px;">
                 Based on 8,000 hands/month (200 hands/session × 40 sessions) · 5% rake with standard caps · 6-max tables
             </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # Build platform comparison rows
-    rows_html = ""
+    rows = []
     for p in platforms:
         rb_low = monthly_rake_low * (p["pct"] / 100)
         rb_high = monthly_rake_high * (p["pct"] / 100)
@@ -1900,7 +1931,7 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
 
         crypto_dot = '<span style="color:#69F0AE;font-size:8px;">₿</span> ' if p["crypto"] else ''
 
-        rows_html += (
+        rows.append(
             f'<div style="display:grid;grid-template-columns:1.8fr 0.6fr 1fr 0.8fr 1fr;align-items:center;'
             f'padding:10px 14px;border-bottom:1px solid rgba(255,255,255,0.04);">'
             f'<div>'
@@ -1915,7 +1946,7 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
         )
 
     # Table header + rows
-    st.markdown(
+    parts.append(
         f'<div style="display:grid;grid-template-columns:1.8fr 0.6fr 1fr 0.8fr 1fr;'
         f'padding:8px 14px;border-bottom:1px solid rgba(255,255,255,0.08);">'
         f'<div style="font-family:Inter,sans-serif;font-size:10px;color:rgba(255,255,255,0.30);text-transform:uppercase;letter-spacing:0.05em;">Platform</div>'
@@ -1923,10 +1954,8 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
         f'<div style="font-family:Inter,sans-serif;font-size:10px;color:rgba(255,255,255,0.30);text-transform:uppercase;letter-spacing:0.05em;text-align:center;">Monthly</div>'
         f'<div style="font-family:Inter,sans-serif;font-size:10px;color:rgba(255,255,255,0.30);text-transform:uppercase;letter-spacing:0.05em;text-align:center;">Annual</div>'
         f'<div style="font-family:Inter,sans-serif;font-size:10px;color:rgba(255,255,255,0.30);text-transform:uppercase;letter-spacing:0.05em;text-align:right;">vs $299/mo</div>'
-        f'</div>',
-        unsafe_allow_html=True
-    )
-    st.markdown(rows_html, unsafe_allow_html=True)
+        f'</div>')
+    parts.extend(rows)
 
     # Your Monthly Math — matching EV System page numbers
     # Use 30% rakeback as baseline (matches EV System "common baseline")
@@ -1946,7 +1975,7 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
     profit_after_sub = total_monthly - sub_cost
     profit_color = "#69F0AE" if profit_after_sub > 0 else "#FF5252"
 
-    st.markdown(f"""
+    parts.append(f"""
         <div style="margin-top:20px;padding:16px 18px;background:rgba(255,255,255,0.02);
             border:1px solid rgba(255,255,255,0.06);border-radius:10px;">
             <div style="font-family:Inter,sans-serif;font-size:11px;font-weight:600;color:rgba(255,255,255,0.30);
@@ -1973,16 +2002,16 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
                 </div>
             </div>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # Rakeback alone vs subscription callout
-    st.markdown(f"""
+    parts.append(f"""
         <div class="callout" style="margin-top:14px;">
             💎 At {rec_stakes['name']} with 30% rakeback, you collect
             <span style="color:#4BA3FF;font-weight:600;">{fmtc(rb_30_low)}–{fmtc(rb_30_high)}/month</span> in rakeback alone.
             {'That more than covers the $299 subscription by itself — your poker winnings are pure profit on top.' if rb_30_low >= sub_cost else f'That offsets {fmtc(rb_30_mid)} of the $299 subscription — your poker winnings cover the rest and then some.'}
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     # Move-up acceleration
     nxt = get_next_stakes(rec_stakes)
@@ -1995,7 +2024,7 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
             saved = months_without - months_with if months_without > 0 else 0
 
             if saved > 0.5:
-                st.markdown(f"""
+                parts.append(f"""
                     <div class="callout" style="margin-top:10px;">
                         📈 <strong>Rakeback accelerates your move-up.</strong>
                         With rakeback, you reach <span style="color:#69F0AE;font-weight:600;">{nxt['name']}</span> in
@@ -2003,10 +2032,10 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
                         ~{months_without:.0f} months — saving you
                         <span style="color:#4BA3FF;font-weight:600;">{saved:.0f} months</span> of grinding.
                     </div>
-                """, unsafe_allow_html=True)
+                """)
 
     # Pro tip
-    st.markdown("""
+    parts.append("""
         <div style="margin-top:14px;font-family:Inter,sans-serif;font-size:11px;color:rgba(255,255,255,0.25);line-height:1.6;">
             💡 <strong style="color:rgba(255,255,255,0.40);">Pro tip:</strong>
             Always sign up through a rakeback affiliate — never use default registration.
@@ -2014,22 +2043,43 @@ def render_rakeback(bankroll, rec_stakes, stats, risk_mode):
             Platforms marked with <span style="color:#69F0AE;">₿</span> accept crypto deposits.
             See the <strong style="color:rgba(255,255,255,0.40);">EV System</strong> page for detailed rake math.
         </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("</div>", unsafe_allow_html=True)
+    """)
+    parts.append("</div>")
+    st.html("".join(parts))
 
 
 # =============================================================================
 # MAIN
 # =============================================================================
 
+# Switching views reruns only this fragment; the hero, editor and move-up
+# projection above aren't rebuilt. A risk-mode change still reruns the app.
+@st.fragment
+def render_deep_dives(bankroll, risk_mode, rec_stakes, stats, sessions, user_id):
+    # st.tabs runs every tab's body on each rerun even though only one is
+    # visible; a radio lets us render just the selected view.
+    view = st.radio("View", HEALTH_VIEWS, horizontal=True,
+                    label_visibility="collapsed", key="health_view")
+
+    if view == "🎲 Risk Analysis":
+        render_risk_of_ruin(bankroll, rec_stakes, stats["bb_per_100"], stats)
+    elif view == "🪜 Stakes Ladder":
+        render_stakes_ladder(bankroll, risk_mode, rec_stakes)
+    elif view == "⚙️ Risk Mode":
+        render_risk_mode_selector(risk_mode, bankroll, rec_stakes)
+    elif view == "📉 Drawdowns":
+        render_drawdown(sessions, bankroll, user_id)
+    else:
+        render_rakeback(bankroll, rec_stakes, stats, risk_mode)
+
+
 def main():
-    st.markdown("""
+    st.html("""
         <div class="page-hdr">
             <h1>Bankroll Health</h1>
             <p>Bankroll monitoring, stakes guidance, and move-up projections</p>
         </div>
-    """, unsafe_allow_html=True)
+    """)
 
     user_id = get_user_id()
     if not user_id:
@@ -2039,13 +2089,8 @@ def main():
     # Load bankroll from DB if not already in session state (survives refresh/re-login)
     if not st.session_state.get("bankroll"):
         try:
-            from db import get_supabase_admin
-            supabase = get_supabase_admin()
-            result = supabase.table("poker_profiles").select(
-                "current_bankroll, user_mode, default_stakes"
-            ).eq("user_id", user_id).execute()
-            if result.data and len(result.data) > 0:
-                row = result.data[0]
+            row = _cached_profile_settings(user_id, st.session_state.get("profile_version", 0))
+            if row:
                 saved_br = float(row.get("current_bankroll", 0) or 0)
                 if saved_br > 0:
                     st.session_state["bankroll"] = saved_br
@@ -2069,11 +2114,22 @@ def main():
 
     sessions = []
     try:
-        sessions = get_user_sessions(user_id, limit=500) or []
+        sessions = user_sessions(user_id, limit=500, columns=SESSION_COLUMNS)
     except Exception:
         sessions = []
 
-    stats = compute_stats(sessions)
+    # Reruns with unchanged sessions reuse this session's stats dict directly,
+    # skipping cache_data's arg hashing and unpickling. The memo keeps the
+    # cache entry's own computed_at and expires when that entry does, so edits
+    # the fingerprint can't see (an older session corrected, a session ended
+    # on another device) land within STATS_TTL_SEC of being computed.
+    fingerprint = (user_id, sessions_fingerprint(sessions))
+    memo = st.session_state.get("_bh_stats_memo")
+    if memo is not None and memo[0] == fingerprint and time.time() - memo[2] < STATS_TTL_SEC:
+        stats = memo[1]
+    else:
+        stats, computed_at = _cached_stats(user_id, fingerprint[1], sessions)
+        st.session_state["_bh_stats_memo"] = (fingerprint, stats, computed_at)
 
     # ===== HERO SNAPSHOT =====
     render_hero(bankroll, stats, rec_stakes, risk_mode)
@@ -2084,35 +2140,13 @@ def main():
     # ===== BANKROLL FUNDAMENTALS (collapsible reference) =====
     render_fundamentals(bankroll, risk_mode, rec_stakes)
 
-    st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
+    st.html("<div style='height:12px'></div>")
 
     # ===== MOVE-UP PROJECTION =====
     render_move_up(bankroll, stats, rec_stakes, risk_mode)
 
-    # ===== TABBED DEEP DIVES =====
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🎲 Risk Analysis",
-        "🪜 Stakes Ladder",
-        "⚙️ Risk Mode",
-        "📉 Drawdowns",
-        "💎 Rakeback",
-    ])
-
-    with tab1:
-        render_risk_of_ruin(bankroll, rec_stakes, stats["bb_per_100"], stats)
-
-    with tab2:
-        render_stakes_ladder(bankroll, risk_mode, rec_stakes)
-
-    with tab3:
-        render_risk_mode_selector(risk_mode, bankroll, rec_stakes)
-
-    with tab4:
-        render_drawdown(sessions, bankroll)
-
-    with tab5:
-        render_rakeback(bankroll, rec_stakes, stats, risk_mode)
-
+    # ===== DEEP DIVES =====
+    render_deep_dives(bankroll, risk_mode, rec_stakes, stats, sessions, user_id)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+# session_cache.py — Cached session-history reads shared by the stats pages
+# Player Stats and Bankroll Health key their analytics caches the same way;
+# keeping the fetch and fingerprint here stops the two pages from drifting.
+#
+# Every widget click reruns a page, but the completed-session list only
+# changes when a session ends. sessions_version is bumped by db.end_session,
+# so sessions finished in this browser session invalidate immediately; the
+# 60s fetch TTL and the list ends in the fingerprint catch sessions written
+# from elsewhere.
+
+from __future__ import annotations
+
+from typing import List
+
+import streamlit as st
+
+from bankroll_stats import normalize_sessions, sort_by_start
+from db import get_user_sessions
+
+
+def sessions_version() -> int:
+    return st.session_state.get("sessions_version", 0)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_user_sessions(user_id: str, version: int, limit: int, columns: str) -> List[dict]:
+    return normalize_sessions(get_user_sessions(user_id, limit=limit, columns=columns) or [])
+
+
+def user_sessions(user_id: str, limit: int, columns: str = "*") -> List[dict]:
+    """Normalized completed sessions, newest first — refreshes every 60s or when sessions_version moves."""
+    return _cached_user_sessions(user_id, sessions_version(), limit, columns)
+
+
+def sessions_fingerprint(sessions: List[dict]) -> tuple:
+    """Cheap cache key for a session list; the list itself is never hashed."""
+    version = sessions_version()
+    if not sessions: return (version, 0, None, None, None)
+    newest, oldest = sessions[0], sessions[-1]
+    return (version, len(sessions), newest.get("id"), newest.get("ended_at"), oldest.get("id"))
+
+
+# cache_resource hands back the same list with no pickle round-trip; callers
+# only read it. The leading underscore keeps Streamlit from hashing the list.
+@st.cache_resource(ttl=300, max_entries=32, show_spinner=False)
+def cached_sorted_sessions(user_id: str, fingerprint: tuple, _sessions: List[dict]) -> List[dict]:
+    """sort_by_start(_sessions), once per fingerprint."""
+    return sort_by_start(_sessions)
@@ -0,0 +1,116 @@
+# test_bankroll_stats.py — Bankroll Health session math
+# Run with: python -m pytest tests/test_bankroll_stats.py
+#       or: python -m tests.test_bankroll_stats
+
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bankroll_stats import calc_drawdown, compute_stats, normalize_sessions
+
+
+# Rows shaped like db.get_user_sessions returns them: numerics may be None,
+# strings or missing entirely, and nothing has gone through normalize_sessions.
+RAW_ROWS = [
+    {"id": "a", "started_at": "2024-03-01T18:00:00+00:00", "ended_at": "2024-03-01T21:00:00+00:00",
+     "profit_loss": 250.0, "hands_played": 90, "bb_size": 2.0},
+    {"id": "b", "started_at": "2024-03-02T18:00:00Z", "ended_at": "2024-03-02T20:30:00Z",
+     "profit_loss": "-120.50", "hands_played": "75", "bb_size": None},
+    {"id": "c", "started_at": "2024-03-03T18:00:00+00:00", "ended_at": None,
+     "profit_loss": None, "hands_played": None, "bb_size": 5.0},
+    {"id": "d", "started_at": "2024-03-04T18:00:00+00:00"},
+]
+
+
+def _close(a, b):
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_compute_stats_accepts_raw_rows():
+    stats = compute_stats([dict(s) for s in RAW_ROWS])
+    assert _close(stats["total_profit"], 129.5)
+    assert stats["total_hands"] == 165
+    assert _close(stats["total_hours"], 5.5)
+    # bb_size None falls back to 2.0: 250/2 - 120.5/2 over 165 hands
+    assert _close(stats["bb_per_100"], (125.0 - 60.25) / 165 * 100)
+    assert stats["total_sessions"] == 4
+    assert stats["has_data"]
+
+
+def test_compute_stats_matches_normalized_rows():
+    raw = compute_stats([dict(s) for s in RAW_ROWS])
+    normalized = compute_stats(normalize_sessions([dict(s) for s in RAW_ROWS]))
+    for key in raw:
+        assert _close(raw[key], normalized[key]), key
+
+
+def test_calc_drawdown_accepts_raw_rows():
+    dd = calc_drawdown([dict(s) for s in RAW_ROWS], 1000.0)
+    # Balances oldest first: 870.5, 1120.5, 1000, 1000, 1000
+    assert _close(dd["peak_bankroll"], 1120.5)
+    assert _close(dd["max_drawdown"], 120.5)
+    assert _close(dd["current_drawdown"], 120.5)
+    assert _close(dd["max_drawdown_pct"], 120.5 / 1120.5 * 100)
+
+
+def _baseline_total_hours(sessions):
+    # The per-row loop compute_stats used before the pd.to_datetime rewrite
+    th = 0
+    for s in sessions:
+        started, ended = s.get("started_at", ""), s.get("ended_at", "")
+        if started and ended:
+            try:
+                th += (datetime.fromisoformat(ended.replace("Z", "+00:00")) -
+                       datetime.fromisoformat(started.replace("Z", "+00:00"))).total_seconds() / 3600
+            except Exception: pass
+    return th
+
+
+def _random_session(rng, i):
+    tz = timezone(timedelta(hours=rng.choice([-8, 0, 5, 10])))
+    start = datetime(2024, 1, 1, tzinfo=tz) + timedelta(minutes=rng.randint(0, 500_000))
+    end = start + timedelta(seconds=rng.randint(60, 8 * 3600))
+    fmt = lambda dt: dt.isoformat().replace("+00:00", "Z") if rng.random() < 0.5 else dt.isoformat()
+    row = {"id": str(i), "started_at": fmt(start), "ended_at": fmt(end),
+           "profit_loss": rng.uniform(-500, 500), "hands_played": rng.randint(0, 300), "bb_size": 2.0}
+    roll = rng.random()
+    if roll < 0.10: row["ended_at"] = ""
+    elif roll < 0.15: row["ended_at"] = None
+    elif roll < 0.20: row["started_at"] = ""
+    elif roll < 0.25: row["ended_at"] = "not-a-timestamp"
+    elif roll < 0.30: del row["ended_at"]
+    return row
+
+
+def test_total_hours_matches_fromisoformat_loop():
+    rng = random.Random(233)
+    for _ in range(50):
+        sessions = [_random_session(rng, i) for i in range(rng.randint(1, 80))]
+        got = compute_stats(sessions)["total_hours"]
+        assert math.isclose(got, _baseline_total_hours(sessions), rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_total_hours_offsets_and_blank_end():
+    sessions = [
+        {"started_at": "2024-05-01T10:00:00Z", "ended_at": "2024-05-01T12:00:00Z"},
+        {"started_at": "2024-05-01T10:00:00-08:00", "ended_at": "2024-05-01T19:30:00Z"},
+        {"started_at": "2024-05-01T10:00:00+10:00", "ended_at": ""},
+    ]
+    assert _close(compute_stats(sessions)["total_hours"], 2.0 + 1.5)
+
+
+if __name__ == "__main__":
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"✅ PASS: {name}")
+            except AssertionError as e:
+                failed += 1
+                print(f"❌ FAIL: {name} {e}")
+    sys.exit(1 if failed else 0)